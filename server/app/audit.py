@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any
+
+from .db import SessionLocal
+from .models import AuditLog
+
+AUDIT_BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+_loop: asyncio.AbstractEventLoop | None = None
+_queue: asyncio.Queue[dict[str, Any]] | None = None
+_task: asyncio.Task | None = None
+
+
+def _write_batch(batch: list[dict[str, Any]]) -> None:
+    with SessionLocal() as db:
+        db.bulk_insert_mappings(AuditLog, batch)
+        db.commit()
+
+
+def log_event(**fields: Any) -> None:
+    fields.setdefault("created_at", datetime.utcnow())
+    if _loop is None or _queue is None:
+        _write_batch([fields])
+        return
+    _loop.call_soon_threadsafe(_queue.put_nowait, fields)
+
+
+async def _flush_forever(queue: asyncio.Queue[dict[str, Any]]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < AUDIT_BATCH_SIZE:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await loop.run_in_executor(None, _write_batch, batch)
+        except Exception:
+            logger.exception("Failed to write %d audit log entries", len(batch))
+
+
+def start_audit_writer() -> None:
+    global _loop, _queue, _task
+    _loop = asyncio.get_running_loop()
+    _queue = asyncio.Queue()
+    _task = _loop.create_task(_flush_forever(_queue))
+
+
+async def stop_audit_writer() -> None:
+    global _loop, _queue, _task
+    if _task is None or _queue is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+
+    pending: list[dict[str, Any]] = []
+    while not _queue.empty():
+        pending.append(_queue.get_nowait())
+    _loop = _queue = _task = None
+    if pending:
+        _write_batch(pending)
@@ -1,15 +1,59 @@
 from __future__ import annotations
 
+import hmac
+import json
+import os
 import secrets
+from typing import NamedTuple
 
+import redis
 from fastapi import Depends, HTTPException, Request, status
 from passlib.context import CryptContext
+from passlib.exc import UnknownHashError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from .db import get_session
 from .models import SessionToken, User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
+
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+DUMMY_HASH = pwd_context.hash("x")
+LEGACY_DUMMY_HASH = pwd_context.handler("bcrypt").hash("x")
+
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(12 * 60 * 60)))
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "0.5"))
+SESSION_CACHE_DELETE_ATTEMPTS = 3
+
+
+class CurrentUser(NamedTuple):
+    id: int
+    username: str
+    role: str
+    is_active: bool
+
+
+session_cache = (
+    redis.Redis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_timeout=REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+    )
+    if REDIS_URL
+    else None
+)
 
 
 def hash_password(password: str) -> str:
@@ -17,30 +61,105 @@ def hash_password(password: str) -> str:
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    try:
+        return pwd_context.verify(password, password_hash)
+    except (UnknownHashError, ValueError, TypeError):
+        pwd_context.verify(password, DUMMY_HASH)
+        return False
+
+
+def authenticate(password: str, password_hash: str | None) -> bool:
+    ok = verify_password(password, password_hash if password_hash is not None else DUMMY_HASH)
+    # Pay for one verify of the other scheme too, so a user still on a legacy bcrypt hash
+    # takes as long as an argon2 user or an unknown username. Drop once no bcrypt hashes remain.
+    if password_hash is not None and pwd_context.identify(password_hash) == "bcrypt":
+        pwd_context.verify(password, DUMMY_HASH)
+    else:
+        pwd_context.verify(password, LEGACY_DUMMY_HASH)
+    return hmac.compare_digest(b"1" if ok and password_hash is not None else b"0", b"1")
+
+
+def password_needs_update(password_hash: str) -> bool:
+    return pwd_context.needs_update(password_hash)
 
 
 def create_token() -> str:
     return secrets.token_urlsafe(32)
 
 
-def get_current_user(request: Request, db: Session = Depends(get_session)) -> User:
+def _session_key(token: str) -> str:
+    return f"sess:{token}"
+
+
+def cache_session(token: str, user: User | CurrentUser) -> None:
+    if session_cache is None:
+        return
+    payload = json.dumps(
+        {"uid": user.id, "username": user.username, "role": user.role, "is_active": user.is_active}
+    )
+    try:
+        session_cache.setex(_session_key(token), SESSION_TTL_SECONDS, payload)
+    except redis.RedisError:
+        pass
+
+
+def invalidate_sessions(tokens: set[str]) -> None:
+    if session_cache is None or not tokens:
+        return
+    keys = [_session_key(token) for token in tokens]
+    for _ in range(SESSION_CACHE_DELETE_ATTEMPTS):
+        try:
+            session_cache.delete(*keys)
+            return
+        except redis.RedisError:
+            continue
+    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Session cache unavailable")
+
+
+def _cached_user(token: str) -> CurrentUser | None:
+    if session_cache is None:
+        return None
+    try:
+        cached = session_cache.get(_session_key(token))
+    except redis.RedisError:
+        return None
+    if not cached:
+        return None
+    data = json.loads(cached)
+    return CurrentUser(id=data["uid"], username=data["username"], role=data["role"], is_active=data["is_active"])
+
+
+def bearer_token(request: Request) -> str:
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
-
-    token = auth_header.replace("Bearer ", "", 1).strip()
-    session = db.query(SessionToken).filter(SessionToken.token == token).first()
-    if not session:
+    return auth_header.replace("Bearer ", "", 1).strip()
+
+
+def get_current_user(request: Request, db: Session = Depends(get_session)) -> CurrentUser:
+    token = bearer_token(request)
+    user = _cached_user(token)
+    if user is not None:
+        if not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
+        return user
+
+    row = db.execute(
+        select(User.id, User.username, User.role, User.is_active)
+        .join(SessionToken, SessionToken.user_id == User.id)
+        .where(SessionToken.token == token)
+    ).first()
+    if not row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == session.user_id).first()
-    if not user or not user.is_active:
+    user = CurrentUser(*row)
+    if not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
+    cache_session(token, user)
     return user
 
 
-def require_admin(user: User = Depends(get_current_user)) -> User:
+def require_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
     return user
@@ -1,17 +1,49 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Iterable
 
-from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, Response, UploadFile
 from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import delete, select, tuple_, update
 from sqlalchemy.orm import Session
 
-from .auth import create_token, get_current_user, require_admin, verify_password
+from .audit import log_event, start_audit_writer, stop_audit_writer
+from .auth import (
+    CurrentUser,
+    authenticate,
+    bearer_token,
+    cache_session,
+    create_token,
+    get_current_user,
+    hash_password,
+    invalidate_sessions,
+    password_needs_update,
+    require_admin,
+)
 from .db import Base, engine, get_session
-from .models import AuditLog, Document, Figure, Manufacturer, Section, SessionToken, User
+from .models import (
+    AuditLog,
+    Document,
+    Figure,
+    Manufacturer,
+    Section,
+    SessionToken,
+    User,
+    audit_log_created_at_index,
+    session_token_user_id_index,
+)
 from .pdf_parser import parse_pdf
 from .schemas import (
     AuditLogOut,
@@ -19,36 +51,88 @@ from .schemas import (
     LoginRequest,
     LoginResponse,
     ManufacturerOut,
+    OrmOut,
     SearchRequest,
     SearchResponse,
     SectionOut,
     FigureOut,
     UserOut,
 )
-from .search_tool import run_search
+from .search_tool import close_client, run_search
 from .seed import seed_data
-from .storage import save_pdf
+from .storage import save_pdf, write_pdf
 
 app = FastAPI(title="NDT Document Hub")
 
 WEB_ROOT = Path(__file__).resolve().parents[2] / "web"
+UPLOAD_CHUNK_SIZE = 1 << 20
+IN_MEMORY_UPLOAD_LIMIT = 32 * 1024 * 1024
+AUDIT_LOG_PAGE_SIZE = 200
+RELOAD_WEB_INDEX = os.getenv("RELOAD_WEB_INDEX") == "1"
 app.mount("/static", StaticFiles(directory=WEB_ROOT, html=False), name="static")
 
+_pwd_pool: ProcessPoolExecutor | None = None
+_pwd_pool_lock = threading.Lock()
+
 
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist.
+    audit_log_created_at_index.create(bind=engine, checkfirst=True)
+    session_token_user_id_index.create(bind=engine, checkfirst=True)
     with next(get_session()) as db:
         seed_data(db)
 
 
+@app.on_event("startup")
+async def start_background_tasks() -> None:
+    global _pwd_pool
+    _pwd_pool = _new_pwd_pool()
+    start_audit_writer()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+    global _pwd_pool
+    await stop_audit_writer()
+    await close_client()
+    with _pwd_pool_lock:
+        pool, _pwd_pool = _pwd_pool, None
+    if pool is not None:
+        await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+
+def _new_pwd_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+
+def _run_in_pwd_pool(func: Callable[..., Any], *args: Any) -> Any:
+    global _pwd_pool
+    pool = _pwd_pool
+    if pool is None:
+        return func(*args)
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        # A dead worker breaks the whole pool; replace it for later logins and finish this one here.
+        with _pwd_pool_lock:
+            if _pwd_pool is pool:
+                _pwd_pool = _new_pwd_pool()
+        pool.shutdown(wait=False)
+        return func(*args)
+
+
 @app.post("/api/auth/login", response_model=LoginResponse)
 def login(payload: LoginRequest, db: Session = Depends(get_session)) -> LoginResponse:
     user = db.query(User).filter(User.username == payload.username).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+    ok = _run_in_pwd_pool(authenticate, payload.password, user.password_hash if user else None)
+    if not ok or not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User inactive")
+    if password_needs_update(user.password_hash):
+        user.password_hash = _run_in_pwd_pool(hash_password, payload.password)
 
     token_value = create_token()
     token = SessionToken(user_id=user.id, token=token_value)
@@ -63,11 +147,19 @@ def login(payload: LoginRequest, db: Session = Depends(get_session)) -> LoginRes
         )
     )
     db.commit()
+    cache_session(token_value, user)
     return LoginResponse(token=token_value, user=UserOut.model_validate(user))
 
 
 @app.post("/api/auth/logout")
-def logout(user: User = Depends(get_current_user), db: Session = Depends(get_session)) -> dict:
+def logout(
+    request: Request,
+    user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_session),
+) -> dict:
+    tokens = {bearer_token(request)}
+    tokens.update(token for (token,) in db.query(SessionToken.token).filter(SessionToken.user_id == user.id))
+    invalidate_sessions(tokens)
     db.query(SessionToken).filter(SessionToken.user_id == user.id).delete()
     db.add(
         AuditLog(
@@ -79,34 +171,46 @@ def logout(user: User = Depends(get_current_user), db: Session = Depends(get_ses
         )
     )
     db.commit()
+    # A request racing the logout may have re-cached a token before the commit.
+    invalidate_sessions(tokens)
     return {"status": "ok"}
 
 
+def _json_list(model: type[OrmOut], objs: Iterable[Any]) -> Response:
+    # Returning a Response skips FastAPI's per-item response_model validation;
+    # response_model is kept for the OpenAPI schema.
+    return Response(content=model.dump_list_json(objs), media_type="application/json")
+
+
 @app.get("/api/manufacturers", response_model=list[ManufacturerOut])
-def list_manufacturers(db: Session = Depends(get_session)) -> list[ManufacturerOut]:
-    return db.query(Manufacturer).all()
+def list_manufacturers(db: Session = Depends(get_session)) -> Response:
+    return _json_list(ManufacturerOut, db.query(Manufacturer).all())
 
 
 @app.get("/api/manufacturers/{manufacturer_id}/documents", response_model=list[DocumentOut])
 def list_documents(
     manufacturer_id: int,
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_session),
-) -> list[DocumentOut]:
-    documents = (
-        db.query(Document).filter(Document.manufacturer_id == manufacturer_id).order_by(Document.uploaded_at.desc()).all()
-    )
-    db.add(
-        AuditLog(
-            user_id=user.id,
-            role=user.role,
-            action_type="VIEW_DOC_LIST",
-            manufacturer_id=manufacturer_id,
-            metadata_json=json.dumps({"count": len(documents)}),
-        )
+) -> Response:
+    documents = db.execute(
+        select(Document.__table__)
+        .where(Document.manufacturer_id == manufacturer_id)
+        .order_by(Document.uploaded_at.desc())
+    ).all()
+    log_event(
+        user_id=user.id,
+        role=user.role,
+        action_type="VIEW_DOC_LIST",
+        manufacturer_id=manufacturer_id,
+        metadata_json=json.dumps({"count": len(documents)}),
     )
-    db.commit()
-    return documents
+    return _json_list(DocumentOut, documents)
+
+
+def _write_upload(file: UploadFile, destination: Path) -> None:
+    with destination.open("wb") as buffer:
+        shutil.copyfileobj(file.file, buffer, UPLOAD_CHUNK_SIZE)
 
 
 @app.post("/api/manufacturers/{manufacturer_id}/documents", response_model=DocumentOut)
@@ -116,20 +220,25 @@ async def upload_document(
     revision_date: str | None = Form(None),
     tags: str | None = Form(None),
     file: UploadFile = File(...),
-    user: User = Depends(require_admin),
+    user: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_session),
 ) -> DocumentOut:
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files allowed")
 
-    temp_path = Path("server/storage/tmp")
-    temp_path.mkdir(parents=True, exist_ok=True)
-    temp_file = temp_path / file.filename
-    with temp_file.open("wb") as buffer:
-        buffer.write(await file.read())
+    loop = asyncio.get_running_loop()
+    if file.size is not None and file.size <= IN_MEMORY_UPLOAD_LIMIT:
+        data = await file.read()
+        sections, figures = await loop.run_in_executor(None, parse_pdf, data)
+        storage_key = await loop.run_in_executor(None, write_pdf, data, file.filename)
+    else:
+        temp_path = Path("server/storage/tmp")
+        temp_path.mkdir(parents=True, exist_ok=True)
+        temp_file = temp_path / file.filename
+        await loop.run_in_executor(None, _write_upload, file, temp_file)
 
-    storage_key = save_pdf(temp_file, file.filename)
-    sections, figures = parse_pdf(temp_file)
+        sections, figures = await loop.run_in_executor(None, parse_pdf, temp_file)
+        storage_key = save_pdf(temp_file, file.filename)
 
     document = Document(
         manufacturer_id=manufacturer_id,
@@ -143,37 +252,43 @@ async def upload_document(
     db.add(document)
     db.flush()
 
-    section_models: list[Section] = []
-    for parsed in sections:
-        section_models.append(
-            Section(
-                document_id=document.id,
-                heading_text=parsed.heading_text,
-                heading_level=parsed.heading_level,
-                page_start=parsed.page_start,
-                page_end=parsed.page_end,
-                order_index=parsed.order_index,
-            )
+    db.bulk_insert_mappings(
+        Section,
+        [
+            {
+                "document_id": document.id,
+                "heading_text": parsed.heading_text,
+                "heading_level": parsed.heading_level,
+                "page_start": parsed.page_start,
+                "page_end": parsed.page_end,
+                "order_index": parsed.order_index,
+            }
+            for parsed in sections
+        ],
+    )
+    section_ids = [
+        section_id
+        for (section_id,) in db.execute(
+            select(Section.id).where(Section.document_id == document.id).order_by(Section.order_index)
         )
-    db.add_all(section_models)
-    db.flush()
+    ]
 
-    figure_models: list[Figure] = []
+    figure_rows: list[dict] = []
     for parsed in figures:
         section_id = None
-        if parsed.section_index is not None and parsed.section_index < len(section_models):
-            section_id = section_models[parsed.section_index].id
-        figure_models.append(
-            Figure(
-                document_id=document.id,
-                section_id=section_id,
-                page_number=parsed.page_number,
-                caption_text=parsed.caption_text,
-                image_storage_key=None,
-                order_index=parsed.order_index,
-            )
+        if parsed.section_index is not None and parsed.section_index < len(section_ids):
+            section_id = section_ids[parsed.section_index]
+        figure_rows.append(
+            {
+                "document_id": document.id,
+                "section_id": section_id,
+                "page_number": parsed.page_number,
+                "caption_text": parsed.caption_text,
+                "image_storage_key": None,
+                "order_index": parsed.order_index,
+            }
         )
-    db.add_all(figure_models)
+    db.bulk_insert_mappings(Figure, figure_rows)
 
     db.add(
         AuditLog(
@@ -182,7 +297,7 @@ async def upload_document(
             action_type="UPLOAD_DOC",
             manufacturer_id=manufacturer_id,
             document_id=document.id,
-            metadata_json=json.dumps({"sections": len(section_models), "figures": len(figure_models)}),
+            metadata_json=json.dumps({"sections": len(section_ids), "figures": len(figure_rows)}),
         )
     )
     db.commit()
@@ -195,25 +310,29 @@ def update_document(
     title: str | None = Form(None),
     revision_date: str | None = Form(None),
     tags: str | None = Form(None),
-    user: User = Depends(require_admin),
+    user: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_session),
 ) -> DocumentOut:
-    document = db.query(Document).filter(Document.id == document_id).first()
+    values = {
+        column: value
+        for column, value in (("title", title), ("revision_date", revision_date), ("tags", tags))
+        if value
+    }
+    if values:
+        document = db.execute(
+            update(Document).where(Document.id == document_id).values(**values).returning(*Document.__table__.c)
+        ).first()
+    else:
+        document = db.execute(select(Document.__table__).where(Document.id == document_id)).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-    if title:
-        document.title = title
-    if revision_date:
-        document.revision_date = revision_date
-    if tags:
-        document.tags = tags
 
     db.add(
         AuditLog(
             user_id=user.id,
             role=user.role,
             action_type="UPDATE_DOC",
-            document_id=document.id,
+            document_id=document_id,
             metadata_json=json.dumps({"title": title, "revision_date": revision_date}),
         )
     )
@@ -224,13 +343,14 @@ def update_document(
 @app.delete("/api/documents/{document_id}")
 def delete_document(
     document_id: int,
-    user: User = Depends(require_admin),
+    user: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_session),
 ) -> dict:
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
+    db.execute(delete(Figure).where(Figure.document_id == document_id))
+    db.execute(delete(Section).where(Section.document_id == document_id))
+    if db.execute(delete(Document).where(Document.id == document_id)).rowcount == 0:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Document not found")
-    db.delete(document)
     db.add(
         AuditLog(
             user_id=user.id,
@@ -246,50 +366,50 @@ def delete_document(
 @app.get("/api/documents/{document_id}/sections", response_model=list[SectionOut])
 def list_sections(
     document_id: int,
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_session),
-) -> list[SectionOut]:
-    sections = db.query(Section).filter(Section.document_id == document_id).order_by(Section.order_index).all()
-    db.add(
-        AuditLog(
-            user_id=user.id,
-            role=user.role,
-            action_type="VIEW_SECTION_LIST",
-            document_id=document_id,
-            metadata_json=json.dumps({"count": len(sections)}),
-        )
+) -> Response:
+    sections = db.execute(
+        select(Section.__table__).where(Section.document_id == document_id).order_by(Section.order_index)
+    ).all()
+    log_event(
+        user_id=user.id,
+        role=user.role,
+        action_type="VIEW_SECTION_LIST",
+        document_id=document_id,
+        metadata_json=json.dumps({"count": len(sections)}),
     )
-    db.commit()
-    return sections
+    return _json_list(SectionOut, sections)
 
 
 @app.get("/api/sections/{section_id}/figures", response_model=list[FigureOut])
 def list_figures(
     section_id: int,
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_session),
-) -> list[FigureOut]:
-    figures = db.query(Figure).filter(Figure.section_id == section_id).order_by(Figure.order_index).all()
-    db.add(
-        AuditLog(
-            user_id=user.id,
-            role=user.role,
-            action_type="VIEW_SECTION",
-            section_id=section_id,
-            metadata_json=json.dumps({"count": len(figures)}),
-        )
+) -> Response:
+    figures = db.execute(
+        select(Figure.__table__).where(Figure.section_id == section_id).order_by(Figure.order_index)
+    ).all()
+    log_event(
+        user_id=user.id,
+        role=user.role,
+        action_type="VIEW_SECTION",
+        section_id=section_id,
+        metadata_json=json.dumps({"count": len(figures)}),
     )
-    db.commit()
-    return figures
+    return _json_list(FigureOut, figures)
 
 
 @app.get("/api/documents/{document_id}/pdf")
 def get_document_pdf(
     document_id: int,
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_session),
 ) -> FileResponse:
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = db.execute(
+        select(Document.storage_key, Document.original_filename).where(Document.id == document_id)
+    ).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     file_path = Path("server/storage") / document.storage_key
@@ -300,29 +420,38 @@ def get_document_pdf(
 
 @app.get("/api/audit-logs", response_model=list[AuditLogOut])
 def list_audit_logs(
-    user: User = Depends(require_admin),
+    before: datetime | None = None,
+    before_id: int | None = None,
+    user: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_session),
-) -> list[AuditLogOut]:
-    logs = db.query(AuditLog).order_by(AuditLog.created_at.desc()).limit(200).all()
-    return logs
+) -> Response:
+    if before_id is not None and before is None:
+        raise HTTPException(status_code=422, detail="before_id requires before")
+    query = db.query(AuditLog)
+    if before is not None and before_id is not None:
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(before, before_id))
+    elif before is not None:
+        query = query.filter(AuditLog.created_at < before)
+    logs = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(AUDIT_LOG_PAGE_SIZE).all()
+    response = _json_list(AuditLogOut, logs)
+    if len(logs) == AUDIT_LOG_PAGE_SIZE:
+        response.headers["X-Next-Before"] = logs[-1].created_at.isoformat()
+        response.headers["X-Next-Before-Id"] = str(logs[-1].id)
+    return response
 
 
 @app.post("/api/tool/search", response_model=SearchResponse)
 async def search_tool(
     payload: SearchRequest,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    user: CurrentUser = Depends(get_current_user),
 ) -> SearchResponse:
     results = await run_search(payload.query)
-    db.add(
-        AuditLog(
-            user_id=user.id,
-            role=user.role,
-            action_type="SEARCH_TOOL",
-            metadata_json=json.dumps({"query": payload.query, "count": len(results)}),
-        )
+    log_event(
+        user_id=user.id,
+        role=user.role,
+        action_type="SEARCH_TOOL",
+        metadata_json=json.dumps({"query": payload.query, "count": len(results)}),
     )
-    db.commit()
     return SearchResponse(query=payload.query, results=results)
 
 
@@ -331,7 +460,13 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@functools.lru_cache(maxsize=1)
+def _index_html() -> str:
+    return (WEB_ROOT / "index.html").read_text(encoding="utf-8")
+
+
 @app.get("/app", include_in_schema=False)
 def app_entry() -> HTMLResponse:
-    index_path = WEB_ROOT / "index.html"
-    return HTMLResponse(index_path.read_text(encoding="utf-8"))
+    if RELOAD_WEB_INDEX:
+        _index_html.cache_clear()
+    return HTMLResponse(_index_html())
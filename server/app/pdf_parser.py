@@ -3,9 +3,12 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import IO, Union
 
-from PyPDF2 import PdfReader
+import pypdfium2 as pdfium
+
+_HEADING_RE = re.compile(r"^(\d+(?:\.\d+)*)\s+(.+)$")
+_FIGURE_RE = re.compile(r"\b(?:Figure|Fig\.)\b", re.IGNORECASE)
 
 
 @dataclass
@@ -25,48 +28,54 @@ class ParsedFigure:
     order_index: int
 
 
-def _detect_sections(text_lines: List[str]) -> List[str]:
-    headings = []
-    heading_pattern = re.compile(r"^(\d+(?:\.\d+)*)\s+(.+)$")
-    for line in text_lines:
-        match = heading_pattern.match(line.strip())
-        if match:
-            headings.append(line.strip())
-    return headings
+def _extract_page_text(document: pdfium.PdfDocument, index: int) -> str:
+    page = document[index]
+    try:
+        text_page = page.get_textpage()
+        try:
+            return text_page.get_text_bounded()
+        finally:
+            text_page.close()
+    finally:
+        page.close()
 
 
-def parse_pdf(file_path: Path) -> tuple[list[ParsedSection], list[ParsedFigure]]:
-    reader = PdfReader(str(file_path))
+def parse_pdf(source: Union[Path, bytes, IO[bytes]]) -> tuple[list[ParsedSection], list[ParsedFigure]]:
     sections: list[ParsedSection] = []
     figures: list[ParsedFigure] = []
     order_index = 1
 
-    for page_index, page in enumerate(reader.pages, start=1):
-        text = page.extract_text() or ""
-        lines = [line for line in text.splitlines() if line.strip()]
-        headings = _detect_sections(lines)
-        for heading in headings:
-            sections.append(
-                ParsedSection(
-                    heading_text=heading,
-                    heading_level="H1",
-                    page_start=page_index,
-                    page_end=page_index,
-                    order_index=order_index,
-                )
-            )
-            order_index += 1
-
-        for line in lines:
-            if re.search(r"\b(Figure|Fig\.)\b", line, re.IGNORECASE):
-                figures.append(
-                    ParsedFigure(
-                        section_index=len(sections) - 1 if sections else None,
-                        page_number=page_index,
-                        caption_text=line.strip(),
-                        order_index=len(figures) + 1,
+    document = pdfium.PdfDocument(source)
+    try:
+        page_count = len(document)
+        for page_index in range(1, page_count + 1):
+            text = _extract_page_text(document, page_index - 1)
+            for raw_line in text.splitlines():
+                line = raw_line.strip()
+                if not line:
+                    continue
+                if _HEADING_RE.match(line):
+                    sections.append(
+                        ParsedSection(
+                            heading_text=line,
+                            heading_level="H1",
+                            page_start=page_index,
+                            page_end=page_index,
+                            order_index=order_index,
+                        )
+                    )
+                    order_index += 1
+                if _FIGURE_RE.search(line):
+                    figures.append(
+                        ParsedFigure(
+                            section_index=len(sections) - 1 if sections else None,
+                            page_number=page_index,
+                            caption_text=line,
+                            order_index=len(figures) + 1,
+                        )
                     )
-                )
+    finally:
+        document.close()
 
     if not sections:
         sections.append(
@@ -74,7 +83,7 @@ def parse_pdf(file_path: Path) -> tuple[list[ParsedSection], list[ParsedFigure]]
                 heading_text="Document Overview",
                 heading_level="H1",
                 page_start=1,
-                page_end=len(reader.pages),
+                page_end=page_count,
                 order_index=1,
             )
         )
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Iterable, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
+_JSON_ROWS = TypeAdapter(list[dict[str, Any]])
 
-class ManufacturerOut(BaseModel):
+
+class OrmOut(BaseModel):
+    @classmethod
+    def dump_list_json(cls, objs: Iterable[Any]) -> bytes:
+        fields = tuple(cls.model_fields)
+        return _JSON_ROWS.dump_json([{name: getattr(obj, name) for name in fields} for obj in objs])
+
+
+class ManufacturerOut(OrmOut):
     id: int
     name: str
     theme_primary: Optional[str]
@@ -16,7 +25,7 @@ class ManufacturerOut(BaseModel):
         from_attributes = True
 
 
-class UserOut(BaseModel):
+class UserOut(OrmOut):
     id: int
     username: str
     role: str
@@ -26,7 +35,7 @@ class UserOut(BaseModel):
         from_attributes = True
 
 
-class DocumentOut(BaseModel):
+class DocumentOut(OrmOut):
     id: int
     manufacturer_id: int
     title: str
@@ -41,7 +50,7 @@ class DocumentOut(BaseModel):
         from_attributes = True
 
 
-class SectionOut(BaseModel):
+class SectionOut(OrmOut):
     id: int
     document_id: int
     heading_text: str
@@ -54,7 +63,7 @@ class SectionOut(BaseModel):
         from_attributes = True
 
 
-class FigureOut(BaseModel):
+class FigureOut(OrmOut):
     id: int
     document_id: int
     section_id: Optional[int]
@@ -67,7 +76,7 @@ class FigureOut(BaseModel):
         from_attributes = True
 
 
-class AuditLogOut(BaseModel):
+class AuditLogOut(OrmOut):
     id: int
     user_id: int
     role: str
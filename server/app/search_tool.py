@@ -1,73 +1,85 @@
 from __future__ import annotations
 
+import asyncio
 from typing import List
 
 import httpx
-from bs4 import BeautifulSoup
+from selectolax.parser import HTMLParser
 
 from .schemas import SearchResult
 
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_keepalive_connections=20))
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def _fetch_aerofab(query: str) -> List[SearchResult]:
     url = f"https://aerofabndt.com/search?q={query}"
     results: List[SearchResult] = []
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        for card in soup.select(".search-result"):
-            title = card.select_one("h3")
-            description = card.select_one(".description")
-            features = [tag.get_text(strip=True) for tag in card.select(".tag")]
-            link = card.select_one("a")
-            if title and link:
-                results.append(
-                    SearchResult(
-                        title=title.get_text(strip=True),
-                        description=description.get_text(strip=True) if description else "",
-                        features=features,
-                        source="aerofabndt",
-                        link=link.get("href", ""),
-                    )
+    response = await get_client().get(url)
+    response.raise_for_status()
+    tree = HTMLParser(response.text)
+    for card in tree.css(".search-result"):
+        title = card.css_first("h3")
+        description = card.css_first(".description")
+        features = [tag.text(strip=True) for tag in card.css(".tag")]
+        link = card.css_first("a")
+        if title and link:
+            results.append(
+                SearchResult(
+                    title=title.text(strip=True),
+                    description=description.text(strip=True) if description else "",
+                    features=features,
+                    source="aerofabndt",
+                    link=link.attributes.get("href") or "",
                 )
+            )
     return results
 
 
 async def _fetch_technandt(query: str) -> List[SearchResult]:
     url = f"https://technandt.com/search?q={query}"
     results: List[SearchResult] = []
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        for card in soup.select(".search-result"):
-            title = card.select_one("h3")
-            description = card.select_one(".description")
-            features = [tag.get_text(strip=True) for tag in card.select(".feature")]
-            link = card.select_one("a")
-            if title and link:
-                results.append(
-                    SearchResult(
-                        title=title.get_text(strip=True),
-                        description=description.get_text(strip=True) if description else "",
-                        features=features,
-                        source="technandt",
-                        link=link.get("href", ""),
-                    )
+    response = await get_client().get(url)
+    response.raise_for_status()
+    tree = HTMLParser(response.text)
+    for card in tree.css(".search-result"):
+        title = card.css_first("h3")
+        description = card.css_first(".description")
+        features = [tag.text(strip=True) for tag in card.css(".feature")]
+        link = card.css_first("a")
+        if title and link:
+            results.append(
+                SearchResult(
+                    title=title.text(strip=True),
+                    description=description.text(strip=True) if description else "",
+                    features=features,
+                    source="technandt",
+                    link=link.attributes.get("href") or "",
                 )
+            )
     return results
 
 
 async def run_search(query: str) -> List[SearchResult]:
     results: List[SearchResult] = []
-    try:
-        results.extend(await _fetch_aerofab(query))
-    except Exception:
-        pass
-    try:
-        results.extend(await _fetch_technandt(query))
-    except Exception:
-        pass
+    batches = await asyncio.gather(_fetch_aerofab(query), _fetch_technandt(query), return_exceptions=True)
+    for batch in batches:
+        if isinstance(batch, BaseException):
+            continue
+        results.extend(batch)
 
     if not results:
         results.append(
@@ -1,36 +1,31 @@
 from __future__ import annotations
 
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 
 from .auth import hash_password
 from .models import Manufacturer, User
 
+DEFAULT_MANUFACTURERS = [
+    {"name": "Boeing", "theme_primary": "#0b3d91", "theme_secondary": "#dce7f7"},
+    {"name": "Airbus", "theme_primary": "#00205b", "theme_secondary": "#e5eef9"},
+    {"name": "Other", "theme_primary": "#2f855a", "theme_secondary": "#e6fffa"},
+]
+
+DEFAULT_USERS = [
+    ("admin", "admin123", "admin"),
+    ("user", "user123", "user"),
+]
+
 
 def seed_data(db: Session) -> None:
-    if db.query(Manufacturer).count() == 0:
-        db.add_all(
-            [
-                Manufacturer(name="Boeing", theme_primary="#0b3d91", theme_secondary="#dce7f7"),
-                Manufacturer(name="Airbus", theme_primary="#00205b", theme_secondary="#e5eef9"),
-                Manufacturer(name="Other", theme_primary="#2f855a", theme_secondary="#e6fffa"),
-            ]
-        )
+    db.execute(insert(Manufacturer).values(DEFAULT_MANUFACTURERS).on_conflict_do_nothing(index_elements=["name"]))
 
-    if db.query(User).count() == 0:
-        db.add_all(
-            [
-                User(
-                    username="admin",
-                    password_hash=hash_password("admin123"),
-                    role="admin",
-                    is_active=True,
-                ),
-                User(
-                    username="user",
-                    password_hash=hash_password("user123"),
-                    role="user",
-                    is_active=True,
-                ),
-            ]
-        )
+    if db.scalar(select(User.id).limit(1)) is None:
+        users = [
+            {"username": username, "password_hash": hash_password(password), "role": role, "is_active": True}
+            for username, password, role in DEFAULT_USERS
+        ]
+        db.execute(insert(User).values(users).on_conflict_do_nothing(index_elements=["username"]))
     db.commit()
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
+import errno
+import os
 import shutil
 from pathlib import Path
 
 STORAGE_ROOT = Path("server/storage")
+PDF_DIR = STORAGE_ROOT / "pdfs"
+PDF_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _destination(filename: str) -> Path:
+    return PDF_DIR / filename.replace(" ", "_")
+
+
+def write_pdf(data: bytes, filename: str) -> str:
+    destination = _destination(filename)
+    destination.write_bytes(data)
+    return f"pdfs/{destination.name}"
 
 
 def save_pdf(file_path: Path, filename: str) -> str:
-    STORAGE_ROOT.mkdir(parents=True, exist_ok=True)
-    safe_name = filename.replace(" ", "_")
-    storage_key = f"pdfs/{safe_name}"
-    destination = STORAGE_ROOT / storage_key
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy(file_path, destination)
-    return storage_key
+    destination = _destination(filename)
+    try:
+        os.replace(file_path, destination)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.copy(file_path, destination)
+        file_path.unlink()
+    return f"pdfs/{destination.name}"